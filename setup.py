@@ -12,6 +12,9 @@ setup(
     install_requires=[
         "mcp>=1.2.0",
     ],
+    extras_require={
+        "fast": ["orjson>=3.0"],
+    },
     python_requires=">=3.10",
     entry_points={
         "console_scripts": [
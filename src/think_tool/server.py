@@ -1,22 +1,122 @@
 #!/usr/bin/env python3
 
 from typing import Any, Dict, List, Optional
-import json
+from collections import Counter, deque
+from dataclasses import dataclass
 import datetime
 import os
+import threading
 import time
 from mcp.server.fastmcp import FastMCP
 
+# Pick the fastest available JSON encoder once at import time
+try:
+    import orjson
+
+    def _dumps(obj, pretty=False):
+        """Serialize obj to a JSON string using orjson, indented when pretty is set"""
+        if pretty:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8')
+        return orjson.dumps(obj).decode('utf-8')
+except ImportError:
+    try:
+        import ujson
+
+        def _dumps(obj, pretty=False):
+            """Serialize obj to a JSON string using ujson, indented when pretty is set"""
+            return ujson.dumps(obj, indent=2 if pretty else 0)
+    except ImportError:
+        import json
+
+        def _dumps(obj, pretty=False):
+            """Serialize obj to a JSON string using the stdlib encoder, indented when pretty is set"""
+            if pretty:
+                return json.dumps(obj, indent=2)
+            return json.dumps(obj, separators=(',', ':'))
+
+_now = datetime.datetime.now
+
+# timespec values accepted by datetime.isoformat
+_TS_PRECISIONS = {'auto', 'hours', 'minutes', 'seconds', 'milliseconds', 'microseconds'}
+
+
+@dataclass(slots=True)
+class ThoughtEntry:
+    """A single recorded thought with its optional structured metadata"""
+    timestamp: str
+    thought: str
+    pattern: Optional[str] = None
+    confidence: Optional[float] = None
+    alternatives: Optional[List[str]] = None
+    justification: Optional[str] = None
+
+
+def _format_entry(i, entry):
+    """Format a single thought log entry for get_thoughts"""
+    # Basic thought info
+    parts = [f"Thought #{i} ({entry.timestamp}):"]
+    
+    # Add pattern and confidence if present
+    metadata = []
+    pattern = entry.pattern
+    if pattern is not None:
+        metadata.append(f"Pattern: {pattern}")
+    confidence = entry.confidence
+    if confidence is not None:
+        metadata.append(f"Confidence: {confidence:.2f}")
+    
+    if metadata:
+        parts.append(f" [{', '.join(metadata)}]")
+    
+    parts.append("\n")
+    parts.append(entry.thought)
+    
+    # Add justification if present
+    justification = entry.justification
+    if justification is not None:
+        parts.append(f"\nJustification: {justification}")
+    
+    # Add alternatives if present
+    alternatives = entry.alternatives
+    if alternatives:
+        parts.append(f"\nAlternatives considered: {', '.join(alternatives)}")
+    
+    parts.append("\n")
+    return "".join(parts)
+
+
 class ThinkToolServer:
     def __init__(self, server_name="think-tool"):
         # Initialize FastMCP server
         self.mcp = FastMCP(server_name)
         
-        # Store the thoughts for logging purposes
-        self.thoughts_log = []
+        # Store the thoughts for logging purposes, keeping at most THINK_MAX entries
+        max_thoughts = int(os.environ.get('THINK_MAX', 10000))
+        if max_thoughts < 1:
+            raise ValueError(f"THINK_MAX must be at least 1, got {max_thoughts}")
+        self.thoughts_log = deque(maxlen=max_thoughts)
+        
+        # Running statistics, kept in sync with thoughts_log by think and clear_thoughts
+        self._reset_stats()
         
         # Get timezone from environment or system
         self.timezone_name = self.get_system_timezone()
+        self._ts_suffix = f" {self.timezone_name}"
+        # Timestamp precision passed to isoformat, e.g. 'seconds' or 'microseconds'
+        self._ts_precision = os.environ.get('THINK_TS_PRECISION', 'milliseconds')
+        if self._ts_precision not in _TS_PRECISIONS:
+            raise ValueError(
+                f"THINK_TS_PRECISION must be one of {', '.join(sorted(_TS_PRECISIONS))}, "
+                f"got {self._ts_precision!r}"
+            )
+        
+        # Periodically refresh the system timezone so DST changes are picked up
+        self._tz_refresh_interval = float(os.environ.get('THINK_TZ_REFRESH', 300))
+        self._tz_timer = None
+        self._tz_refresh_stopped = False
+        self._tz_lock = threading.Lock()
+        if not os.environ.get('TZ') and self._tz_refresh_interval > 0:
+            self._schedule_timezone_refresh()
         
         # Register tools
         self.register_tools()
@@ -30,15 +130,113 @@ class ThinkToolServer:
         
         # Try to get system timezone
         # This returns abbreviation like 'JST', 'PST', etc.
-        return time.tzname[time.daylight]
+        return time.tzname[time.localtime().tm_isdst > 0]
+    
+    def _schedule_timezone_refresh(self):
+        """Start a daemon timer that refreshes the cached timezone suffix"""
+        with self._tz_lock:
+            if self._tz_refresh_stopped:
+                return
+            timer = threading.Timer(self._tz_refresh_interval, self._refresh_timezone)
+            timer.daemon = True
+            self._tz_timer = timer
+            timer.start()
+    
+    def _refresh_timezone(self):
+        """Re-read the system timezone and reschedule the next refresh"""
+        try:
+            timezone_name = self.get_system_timezone()
+            self.timezone_name = timezone_name
+            # Single attribute rebind, so readers always see a complete suffix
+            self._ts_suffix = f" {timezone_name}"
+        except Exception:
+            # Keep the last known timezone; a failed read must not end the refresh cycle
+            pass
+        finally:
+            self._schedule_timezone_refresh()
+    
+    def stop_timezone_refresh(self):
+        """Cancel the pending timezone refresh and prevent any further ones"""
+        with self._tz_lock:
+            self._tz_refresh_stopped = True
+            if self._tz_timer is not None:
+                self._tz_timer.cancel()
+                self._tz_timer = None
+    
+    def _reset_stats(self):
+        """Reset the running statistics for an empty thought log"""
+        self._appended = 0
+        self._total_len = 0
+        # Monotonic queue of (length, sequence number) candidates for the longest thought.
+        # Lengths strictly decrease from front to back, so the front is the longest and
+        # the latest entry wins on ties.
+        self._longest = deque()
+        self._pattern_counts = Counter()
+        self._conf_sum = 0.0
+        self._conf_n = 0
+        self._n_just = 0
+        self._n_alt = 0
+    
+    def _record_stats(self, entry):
+        """Fold a newly appended thought into the running statistics"""
+        length = len(entry.thought)
+        self._total_len += length
+        longest = self._longest
+        while longest and longest[-1][0] <= length:
+            longest.pop()
+        longest.append((length, self._appended))
+        self._appended += 1
+        
+        pattern = entry.pattern
+        if pattern is not None:
+            self._pattern_counts[pattern] += 1
+        confidence = entry.confidence
+        if confidence is not None:
+            self._conf_sum += confidence
+            self._conf_n += 1
+        if entry.justification is not None:
+            self._n_just += 1
+        if entry.alternatives:
+            self._n_alt += 1
+    
+    def _discard_stats(self, entry):
+        """Remove a thought evicted from the front of the log from the running statistics"""
+        self._total_len -= len(entry.thought)
+        # The evicted entry is the oldest one still in the log
+        if self._longest[0][1] == self._appended - len(self.thoughts_log):
+            self._longest.popleft()
+        
+        pattern = entry.pattern
+        if pattern is not None:
+            self._pattern_counts[pattern] -= 1
+            if not self._pattern_counts[pattern]:
+                del self._pattern_counts[pattern]
+        confidence = entry.confidence
+        if confidence is not None:
+            self._conf_n -= 1
+            # Drop accumulated float error once nothing is left to average
+            self._conf_sum = self._conf_sum - confidence if self._conf_n else 0.0
+        if entry.justification is not None:
+            self._n_just -= 1
+        if entry.alternatives:
+            self._n_alt -= 1
     
     def get_local_timestamp(self):
         """Get current timestamp in local timezone with timezone info"""
-        now = datetime.datetime.now()
-        # Format with timezone abbreviation
-        return f"{now.isoformat()} {self.timezone_name}"
+        # Timezone suffix is formatted once at init
+        return _now().isoformat(timespec=self._ts_precision) + self._ts_suffix
     
     def register_tools(self):
+        # Bind objects that never get rebound to closure locals so the handlers skip self lookups.
+        # thoughts_log is only ever cleared in place; the stats counters are rebound by
+        # _reset_stats, so those are still read through self. get_local_timestamp reads the
+        # timezone suffix through self, so refreshes by the timer are picked up.
+        log = self.thoughts_log
+        maxlen = log.maxlen
+        local_timestamp = self.get_local_timestamp
+        record_stats = self._record_stats
+        discard_stats = self._discard_stats
+        
         # Register the think tool
         @self.mcp.tool()
         async def think(
@@ -60,32 +258,32 @@ class ThinkToolServer:
                 justification: Reasoning or evidence supporting this thought
             """
             # Log the thought with a timestamp in local timezone
-            timestamp = self.get_local_timestamp()
-            thought_entry = {
-                "timestamp": timestamp,
-                "thought": thought
-            }
+            thought_entry = ThoughtEntry(
+                timestamp=local_timestamp(),
+                thought=thought,
+                pattern=pattern,
+                confidence=confidence,
+                alternatives=alternatives,
+                justification=justification
+            )
             
-            # Add optional structured parameters if provided
-            if pattern is not None:
-                thought_entry["pattern"] = pattern
-            if confidence is not None:
-                thought_entry["confidence"] = confidence
-            if alternatives is not None:
-                thought_entry["alternatives"] = alternatives
-            if justification is not None:
-                thought_entry["justification"] = justification
-            
-            self.thoughts_log.append(thought_entry)
+            # A full deque drops its oldest entry on append, so discount it first
+            evicted = log[0] if len(log) == maxlen else None
+            if evicted is not None:
+                discard_stats(evicted)
+            log.append(thought_entry)
+            record_stats(thought_entry)
             
             # Return a confirmation with structured info
-            confirmation = f"Thought recorded: {thought[:100]}..."
+            # Only truncate (and mark the cut) when the thought is actually long
+            preview = thought if len(thought) <= 100 else thought[:100] + "..."
+            confirmation = ["Thought recorded: ", preview]
             if pattern:
-                confirmation += f" [Pattern: {pattern}]"
+                confirmation.append(f" [Pattern: {pattern}]")
             if confidence is not None:
-                confirmation += f" [Confidence: {confidence:.2f}]"
+                confirmation.append(f" [Confidence: {confidence:.2f}]")
             
-            return confirmation
+            return "".join(confirmation)
 
         @self.mcp.tool()
         async def get_thoughts() -> str:
@@ -93,36 +291,10 @@ class ThinkToolServer:
             
             This tool helps review the thinking process that has occurred so far.
             """
-            if not self.thoughts_log:
+            if not log:
                 return "No thoughts have been recorded yet."
             
-            formatted_thoughts = []
-            for i, entry in enumerate(self.thoughts_log, 1):
-                # Basic thought info
-                thought_str = f"Thought #{i} ({entry['timestamp']}):"
-                
-                # Add pattern and confidence if present
-                metadata = []
-                if "pattern" in entry:
-                    metadata.append(f"Pattern: {entry['pattern']}")
-                if "confidence" in entry:
-                    metadata.append(f"Confidence: {entry['confidence']:.2f}")
-                
-                if metadata:
-                    thought_str += f" [{', '.join(metadata)}]"
-                
-                thought_str += f"\n{entry['thought']}"
-                
-                # Add justification if present
-                if "justification" in entry:
-                    thought_str += f"\nJustification: {entry['justification']}"
-                
-                # Add alternatives if present
-                if "alternatives" in entry and entry['alternatives']:
-                    thought_str += f"\nAlternatives considered: {', '.join(entry['alternatives'])}"
-                
-                thought_str += "\n"
-                formatted_thoughts.append(thought_str)
+            formatted_thoughts = [_format_entry(i, entry) for i, entry in enumerate(log, 1)]
             
             return "\n".join(formatted_thoughts)
 
@@ -132,59 +304,48 @@ class ThinkToolServer:
             
             Use this to start fresh if the thinking process needs to be reset.
             """
-            count = len(self.thoughts_log)
-            self.thoughts_log = []
+            count = len(log)
+            log.clear()
+            self._reset_stats()
             return f"Cleared {count} recorded thoughts."
 
         @self.mcp.tool()
-        async def get_thought_stats() -> str:
-            """Get statistics about the thoughts recorded in the current session."""
-            if not self.thoughts_log:
-                return "No thoughts have been recorded yet."
+        async def get_thought_stats(pretty: bool = False) -> str:
+            """Get statistics about the thoughts recorded in the current session.
             
-            total_thoughts = len(self.thoughts_log)
-            avg_length = sum(len(entry["thought"]) for entry in self.thoughts_log) / total_thoughts if total_thoughts else 0
-            longest_thought = max((len(entry["thought"]), i) for i, entry in enumerate(self.thoughts_log)) if self.thoughts_log else (0, -1)
-            
-            # Pattern statistics
-            pattern_counts = {}
-            confidence_values = []
-            thoughts_with_justification = 0
-            thoughts_with_alternatives = 0
+            Args:
+                pretty: Indent the returned JSON for human reading. Compact JSON is returned by default.
+            """
+            if not log:
+                return "No thoughts have been recorded yet."
             
-            for entry in self.thoughts_log:
-                if "pattern" in entry:
-                    pattern = entry["pattern"]
-                    pattern_counts[pattern] = pattern_counts.get(pattern, 0) + 1
-                
-                if "confidence" in entry:
-                    confidence_values.append(entry["confidence"])
-                
-                if "justification" in entry:
-                    thoughts_with_justification += 1
-                
-                if "alternatives" in entry and entry["alternatives"]:
-                    thoughts_with_alternatives += 1
+            # The log is non-empty from here on, so there is always a longest thought
+            total_thoughts = len(log)
+            longest_length, longest_seq = self._longest[0]
             
             stats = {
                 "total_thoughts": total_thoughts,
-                "average_length": round(avg_length, 2),
-                "longest_thought_index": longest_thought[1] + 1 if longest_thought[1] >= 0 else None,
-                "longest_thought_length": longest_thought[0] if longest_thought[0] > 0 else None,
-                "pattern_distribution": pattern_counts,
-                "average_confidence": round(sum(confidence_values) / len(confidence_values), 2) if confidence_values else None,
-                "thoughts_with_justification": thoughts_with_justification,
-                "thoughts_with_alternatives": thoughts_with_alternatives
+                "average_length": round(self._total_len / total_thoughts, 2),
+                # Convert the longest thought's sequence number to its 1-based position in the log
+                "longest_thought_index": longest_seq - (self._appended - total_thoughts) + 1,
+                "longest_thought_length": longest_length if longest_length > 0 else None,
+                "pattern_distribution": self._pattern_counts,
+                "average_confidence": round(self._conf_sum / self._conf_n, 2) if self._conf_n else None,
+                "thoughts_with_justification": self._n_just,
+                "thoughts_with_alternatives": self._n_alt
             }
             
-            return json.dumps(stats, indent=2)
+            return _dumps(stats, pretty)
     
     def run(self, transport='stdio'):
         """Run the server with the specified transport"""
         print(f"Starting Think Tool MCP Server with {transport} transport...")
         print(f"Using timezone: {self.timezone_name}")
         print(f"Current time: {self.get_local_timestamp()}")
-        self.mcp.run(transport=transport)
+        try:
+            self.mcp.run(transport=transport)
+        finally:
+            self.stop_timezone_refresh()
 
 
 def main():